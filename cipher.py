@@ -2,7 +2,9 @@
 
 import numpy as np
 
-from math import sqrt, ceil
+from itertools import chain, count
+from math import sqrt, ceil, isqrt
+from numba import njit
 from random import randint
 from magic_square import create_square, transform_magic_square
 
@@ -33,33 +35,33 @@ def encrypt(
     # Magic square creation & transformation
     layout = transform_magic_square(
         create_square(ceil(sqrt(text_len))),
-        transformations
+        transformations,
+        # Freshly created squares are known to be magic
+        verify=False
     )
 
     # Reducing unnecessary 2D
     layout = layout.flatten()
 
     # Encryption
-    ciphertext = np.full(shape=layout.size, fill_value='', dtype=str)
-    for i in range(layout.size):
-        if layout[i] <= text_len:
-            ciphertext[i] = text[layout[i] - 1]
-        else:
-            ciphertext[i] = empty
+    # Pad text so every layout value maps to a character
+    padded = text + empty * (layout.size - text_len)
+    chars = np.frombuffer(padded.encode('utf-32-le'), dtype=np.uint32)
+    # Gather characters through the layout permutation in one vectorized step
+    ciphertext = chars[layout - 1]
 
     # Convert to binary
     # Adjust bits for binary values
-    max_val = np.amax(layout)
-    bits = MIN_BITS
-    while max_val >= 2 ** bits:
-        bits *= 2
+    # Width grows in powers of two starting from MIN_BITS
+    needed = int(np.amax(layout)).bit_length()
+    bits = max(MIN_BITS, 1 << (needed - 1).bit_length())
 
     # Create key
-    key = ''.join([f"{i:0{bits}b}" for i in layout])
+    key = encode_layout(layout, bits)
     # Add bits to the key
     key = f"{bits:b}{delimiter}{key}"
 
-    return key, ''.join(ciphertext)
+    return key, ciphertext.astype('<u4').tobytes().decode('utf-32-le')
 
 
 def decrypt(
@@ -86,10 +88,7 @@ def decrypt(
         # Convert from binary
         bits, key = key.split(delimiter)
         bits = int(bits, 2)
-        layout = np.array(
-            [int(key[i:i + bits], 2) for i in range(0, len(key), bits)],
-            dtype=int
-        )
+        layout = decode_layout(key, bits)
     except ValueError:
         return False, "Wrong key format"
 
@@ -99,11 +98,14 @@ def decrypt(
         return status, message
 
     # Decryption
-    plaintext = np.full(shape=layout.size, fill_value='', dtype=str)
-    for i in range(layout.size):
-        plaintext[layout[i] - 1] = text[i]
+    # Scatter characters back through the layout permutation in one vectorized step
+    chars = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    plaintext = np.empty(layout.size, dtype=np.uint32)
+    plaintext[layout - 1] = chars
+    # Drop 'empty' characters with a mask instead of a str.replace pass
+    plaintext = plaintext[plaintext != ord(empty)]
 
-    return True, ''.join(plaintext).replace(empty, '')
+    return True, plaintext.astype('<u4').tobytes().decode('utf-32-le')
 
 
 def encrypt_enhanced(
@@ -126,7 +128,9 @@ def encrypt_enhanced(
     # Magic square creation & transformation
     layout = transform_magic_square(
         create_square(ceil(sqrt(text_len))),
-        transformations
+        transformations,
+        # Freshly created squares are known to be magic
+        verify=False
     )
 
     # Reducing unnecessary 2D
@@ -136,42 +140,37 @@ def encrypt_enhanced(
     # Additional encryption step
     offset = randint(0, MAX_OFFSET)
     # Make sure that offset won't make extra 'empty' characters in ciphertext
-    while True:
-        for i in range(len(text)):
-            if ord(text[i]) ^ offset == ord(empty):
-                offset -= 1
-                break
-        else:
-            break
-
-    ciphertext = np.full(shape=layout.size, fill_value='', dtype=str)
-    while True:
-        for i in range(layout.size):
-            if layout[i] <= text_len:
-                # Additional encryption using XOR with magic square and offset
-                ciphertext[i] = \
-                    chr(ord(text[layout[i] - 1]) ^ offset)
-            else:
-                ciphertext[i] = empty
-        # Make sure that text was encrypted successfully
-        if len(''.join(ciphertext)) == layout.size:
-            break
-        # Change offset if not
-        offset = (offset + 1) % MAX_OFFSET
+    # A character collides with 'empty' when ord(char) ^ offset == ord(empty),
+    # so all colliding offsets can be computed upfront with one vectorized XOR
+    chars = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    forbidden = set((chars ^ ord(empty)).tolist())
+    # Also avoid offsets that XOR a character into the NUL codepoint,
+    # which would make it vanish from the ciphertext
+    forbidden |= set(chars.tolist())
+    # Search downward first and continue above MAX_OFFSET if every lower
+    # candidate collides - forbidden is finite, so this always terminates
+    # on a non-negative offset instead of underflowing below zero
+    offset = next(
+        o for o in chain(range(offset, -1, -1), count(MAX_OFFSET + 1))
+        if o not in forbidden
+    )
+
+    # Additional encryption using XOR with magic square and offset,
+    # fused into a single compiled pass over the layout
+    ciphertext = _encrypt_kernel(chars, layout, text_len, ord(empty), offset)
 
     # Convert to binary
     # Adjust bits for binary values
-    max_val = np.amax(layout)
-    bits = MIN_BITS
-    while max_val >= 2 ** bits:
-        bits *= 2
+    # Width grows in powers of two starting from MIN_BITS
+    needed = int(np.amax(layout)).bit_length()
+    bits = max(MIN_BITS, 1 << (needed - 1).bit_length())
 
     # Create key
-    key = ''.join([f"{i:0{bits}b}" for i in layout])
+    key = encode_layout(layout, bits)
     # Add binary values length to the key
     key = f"{bits:b}{delimiter}{offset:b}{delimiter}{key}"
 
-    return key, ''.join(ciphertext)
+    return key, ciphertext.astype('<u4').tobytes().decode('utf-32-le')
 
 
 def decrypt_enhanced(
@@ -199,10 +198,7 @@ def decrypt_enhanced(
         bits, offset, key = key.split(delimiter)
         offset = int(offset, 2)
         bits = int(bits, 2)
-        layout = np.array(
-            [int(key[i:i + bits], 2) for i in range(0, len(key), bits)],
-            dtype=int
-        )
+        layout = decode_layout(key, bits)
     except ValueError:
         return False, "Wrong key format"
 
@@ -212,12 +208,105 @@ def decrypt_enhanced(
         return status, message
 
     # Decryption
-    plaintext = np.full(shape=layout.size, fill_value='', dtype=str)
+    # Scatter and XOR everything but 'empty' in a single compiled pass
+    chars = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    plaintext = _decrypt_kernel(chars, layout, ord(empty), offset)
+    # Positions left NUL held 'empty' characters and are dropped
+    plaintext = plaintext[plaintext != 0]
+
+    return True, plaintext.astype('<u4').tobytes().decode('utf-32-le')
+
+
+@njit(cache=True)
+def _encrypt_kernel(
+        chars: np.ndarray,
+        layout: np.ndarray,
+        text_len: int,
+        empty_ord: int,
+        offset: int
+) -> np.ndarray:
+    """
+    Gather and XOR text codepoints through the layout permutation
+
+    :param chars: Text codepoints
+    :param layout: Magic Square layout
+    :param text_len: Amount of text characters
+    :param empty_ord: Codepoint of the 'empty' symbol
+    :param offset: XOR offset
+    :return: Ciphertext codepoints
+    """
+    ciphertext = np.empty(layout.size, np.uint32)
     for i in range(layout.size):
-        plaintext[layout[i] - 1] = \
-            chr(ord(text[i]) ^ offset) if text[i] != empty else ''
+        if layout[i] <= text_len:
+            ciphertext[i] = chars[layout[i] - 1] ^ offset
+        else:
+            ciphertext[i] = empty_ord
 
-    return True, ''.join(plaintext)
+    return ciphertext
+
+
+@njit(cache=True)
+def _decrypt_kernel(
+        chars: np.ndarray,
+        layout: np.ndarray,
+        empty_ord: int,
+        offset: int
+) -> np.ndarray:
+    """
+    Scatter and XOR ciphertext codepoints back through the layout permutation
+
+    'empty' positions are left NUL for the caller to drop
+
+    :param chars: Ciphertext codepoints
+    :param layout: Magic Square layout
+    :param empty_ord: Codepoint of the 'empty' symbol
+    :param offset: XOR offset
+    :return: Plaintext codepoints
+    """
+    plaintext = np.zeros(layout.size, np.uint32)
+    for i in range(layout.size):
+        if chars[i] != empty_ord:
+            plaintext[layout[i] - 1] = chars[i] ^ offset
+
+    return plaintext
+
+
+def encode_layout(layout: np.ndarray, bits: int) -> str:
+    """
+    Serialize layout values into a binary string
+
+    :param layout: Magic Square layout
+    :param bits: Amount of bits per value
+    :return: Binary representation of the layout
+    """
+    # Unpack every value into its 64 bits
+    unpacked = np.unpackbits(
+        layout.astype('>u8').view(np.uint8).reshape(-1, 8),
+        axis=1
+    )
+    # Keep 'bits' lowest bits per value and render them as ASCII '0'/'1'
+    return (unpacked[:, -bits:] + ord('0')).tobytes().decode('ascii')
+
+
+def decode_layout(key: str, bits: int) -> np.ndarray:
+    """
+    Parse a binary string back into layout values
+
+    :param key: Binary representation of the layout
+    :param bits: Amount of bits per value
+    :return: Magic Square layout as numpy 1D array
+    """
+    # Convert ASCII '0'/'1' to bit values, 'bits' per row
+    key_bits = np.frombuffer(key.encode('ascii'), dtype=np.uint8) - ord('0')
+    key_bits = key_bits.reshape(-1, bits)
+    if key_bits.max(initial=0) > 1:
+        raise ValueError("key is not a binary string")
+
+    # Pad rows to 64 bits and pack them back into integers
+    padded = np.zeros(shape=(key_bits.shape[0], 64), dtype=np.uint8)
+    padded[:, -bits:] = key_bits
+
+    return np.packbits(padded, axis=1).view('>u8').ravel().astype(int)
 
 
 def check_layout(layout: np.ndarray, text: str) -> tuple[bool, str]:
@@ -228,16 +317,23 @@ def check_layout(layout: np.ndarray, text: str) -> tuple[bool, str]:
     :param text: Text to decrypt
     :return: Check status, check message
     """
-    # Check that array has an even number of elements
-    if isinstance(sqrt(layout.size), int):
+    # Check that the amount of elements forms a square
+    # The old isinstance(sqrt(...), int) test always passed since sqrt returns float
+    size = isqrt(layout.size)
+    if size * size != layout.size:
         return False, "Wrong key shape"
 
     # Check that text and array has the same amount of elements
     if len(text) != layout.size:
         return False, "Wrong key size"
 
-    # Check that array consists of a sequence
-    if len(np.unique(layout)) != layout.size:
+    # Check that array is a permutation of 1..size^2
+    # A bitmap test is O(N), unlike the sort hidden inside np.unique
+    if not ((layout >= 1) & (layout <= layout.size)).all():
+        return False, "Wrong key contents"
+    seen = np.zeros(layout.size + 1, dtype=bool)
+    seen[layout] = True
+    if seen[1:].sum() != layout.size:
         return False, "Wrong key contents"
 
     return True, "The key is right"
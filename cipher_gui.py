@@ -3,49 +3,63 @@
 import sys
 
 from PyQt5 import uic
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QApplication, QMainWindow
 
-from cipher import decrypt, encrypt, decrypt_enhanced, encrypt_enhanced
+# Parsed Qt Designer form, loaded lazily on first window creation
+Form = None
 
-Form, _ = uic.loadUiType("cipher.ui")
 
+def load_form():
+    """Parse the Qt Designer form on first use and cache the result"""
+    global Form
+    if Form is None:
+        Form, _ = uic.loadUiType("cipher.ui")
+    return Form
 
-class CipherWindow(QMainWindow, Form):
+
+class CipherWindow(QMainWindow):
     """Cipher program GUI window"""
     def __init__(self):
         """Window init method"""
         super().__init__()
-        self.setupUi(self)
+        self.ui = load_form()()
+        self.ui.setupUi(self)
 
         # Add signals to buttons
-        self.encryptButton.clicked.connect(self.encrypt_signal)
-        self.decryptButton.clicked.connect(self.decrypt_signal)
-        self.toInputButton.clicked.connect(self.move_ciphertext)
+        self.ui.encryptButton.clicked.connect(self.encrypt_signal)
+        self.ui.decryptButton.clicked.connect(self.decrypt_signal)
+        self.ui.toInputButton.clicked.connect(self.move_ciphertext)
 
         # Add signals to radio buttons
-        self.basicRadio.toggled.connect(self.change_mode)
-        self.enhancedRadio.toggled.connect(self.change_mode)
+        self.ui.basicRadio.toggled.connect(self.change_mode)
+        self.ui.enhancedRadio.toggled.connect(self.change_mode)
 
         # Set fields for more flexible cipher mode change
+        # Resolved after the first paint so the window appears
+        # before the cipher module (and numpy) is imported
         self.encrypt_func = None
         self.decrypt_func = None
-        self.change_mode()
+        QTimer.singleShot(0, self.change_mode)
 
         self.show()
 
     def move_ciphertext(self):
         """Copy text from output text box to input text box"""
-        self.inputEdit.setPlainText(
-            self.outputEdit.toPlainText()
+        self.ui.inputEdit.setPlainText(
+            self.ui.outputEdit.toPlainText()
         )
 
     def change_mode(self):
         """Change encryption mode"""
-        if self.basicRadio.isChecked():
+        # Imported here to keep numpy off the GUI startup path
+        from cipher import decrypt, encrypt, decrypt_enhanced, encrypt_enhanced
+
+        if self.ui.basicRadio.isChecked():
             self.encrypt_func = \
                 lambda *args: encrypt(*args, transformations=-1)
             self.decrypt_func = decrypt
-        elif self.enhancedRadio.isChecked():
+        elif self.ui.enhancedRadio.isChecked():
             self.encrypt_func = \
                 lambda *args: encrypt_enhanced(*args, transformations=-1)
             self.decrypt_func = decrypt_enhanced
@@ -53,19 +67,19 @@ class CipherWindow(QMainWindow, Form):
     def encrypt_signal(self):
         """Encryption GUI logic"""
         # Get text from input text field
-        text = self.inputEdit.toPlainText()
+        text = self.ui.inputEdit.toPlainText()
 
         # Check text input
         if len(text) == 0:
-            self.statusbar.showMessage('Empty input')
+            self.ui.statusbar.showMessage('Empty input')
             return
 
         # Encrypt
         key, ciphertext = self.encrypt_func(text)
 
         # Show result in key and output text fields
-        self.keyEdit.setPlainText(key)
-        self.outputEdit.setPlainText(ciphertext)
+        self.ui.keyEdit.setPlainText(key)
+        self.ui.outputEdit.setPlainText(ciphertext)
 
         # Set status
         self.statusBar().showMessage(f'Encryption successful!')
@@ -73,15 +87,15 @@ class CipherWindow(QMainWindow, Form):
     def decrypt_signal(self):
         """Decryption GUI logic"""
         # Get text and key from input and key text fields
-        text = self.inputEdit.toPlainText()
-        key = self.keyEdit.toPlainText()
+        text = self.ui.inputEdit.toPlainText()
+        key = self.ui.keyEdit.toPlainText()
 
         # Check text and key input
         if len(text) == 0:
-            self.statusbar.showMessage('Empty input')
+            self.ui.statusbar.showMessage('Empty input')
             return
         if len(key) == 0:
-            self.statusbar.showMessage('Empty key')
+            self.ui.statusbar.showMessage('Empty key')
             return
 
         # Decryption
@@ -90,7 +104,7 @@ class CipherWindow(QMainWindow, Form):
 
         # Set status and show result
         if status:
-            self.outputEdit.setPlainText(plaintext)
+            self.ui.outputEdit.setPlainText(plaintext)
             self.statusBar().showMessage(f'Decryption successful!')
         else:
             self.statusBar().showMessage(f'Failed to decrypt: {plaintext}')
@@ -1,31 +1,92 @@
 """Magic Square Module"""
-from copy import deepcopy
+from functools import lru_cache
 
 import numpy as np
 
-from random import randint
-
 START_VALUE = 1
 DEFAULT_OPS_AMOUNT = 5
 
+# Cells of a doubly even square quarter that take the reverse sequence value
+# [ ] [x] [x] [ ]
+# [x] [ ] [ ] [x]
+# [x] [ ] [ ] [x]
+# [ ] [x] [x] [ ]
+DOUBLE_EVEN_PATTERN = np.array(
+    [[0, 1, 1, 0],
+     [1, 0, 0, 1],
+     [1, 0, 0, 1],
+     [0, 1, 1, 0]],
+    dtype=bool
+)
+
+
+def _select_dtype(size: int) -> type:
+    """
+    Select the smallest integer dtype that holds every value of a square
 
-def create_square(size: int) -> np.ndarray:
+    :param size: Order of Magic Square
+    :return: NumPy integer type
     """
-    Create Magic Square of odd, even or doubly even order based on size argument
+    if size ** 2 < 2 ** 8:
+        return np.uint8
+    if size ** 2 < 2 ** 16:
+        return np.uint16
+    return np.int32
+
+
+@lru_cache(maxsize=16)
+def _tile_pattern(quarters: int) -> np.ndarray:
+    """
+    Tile the doubly even quarter pattern over a whole square
+
+    The result is cached per size and returned read-only
+
+    :param quarters: Amount of quarters (4x4) in one row
+    :return: Boolean mask as numpy 2D array
+    """
+    mask = np.tile(DOUBLE_EVEN_PATTERN, (quarters, quarters))
+    mask.setflags(write=False)
+    return mask
+
+
+@lru_cache(maxsize=64)
+def _create_square_cached(size: int) -> np.ndarray:
+    """
+    Create and cache the base Magic Square for a size
+
+    The cached array is shared between calls and therefore read-only
 
     :param size: Order of Magic Square
     :return: Magic Square as numpy 2D array
     """
     # Adjust size to acceptable value
-    while True:
-        if size < 3:
-            pass
-        elif size % 2 != 0:
-            return create_odd_square(size)
-        elif size % 4 == 0:
-            return create_double_even_square(size)
+    size = max(size, 3)
+    # Orders that are even but not doubly even are not supported,
+    # bump them to the next odd order
+    if size % 2 == 0 and size % 4 != 0:
         size += 1
 
+    if size % 2 != 0:
+        square = create_odd_square(size)
+    else:
+        square = create_double_even_square(size)
+
+    # The cached array is shared between calls, so freeze it
+    square.setflags(write=False)
+    return square
+
+
+def create_square(size: int) -> np.ndarray:
+    """
+    Create Magic Square of odd, even or doubly even order based on size argument
+
+    Construction is cached per size, every call returns a fresh writable copy
+
+    :param size: Order of Magic Square
+    :return: Magic Square as numpy 2D array
+    """
+    return _create_square_cached(size).copy()
+
 
 def create_odd_square(size: int) -> np.ndarray:
     """
@@ -34,30 +95,20 @@ def create_odd_square(size: int) -> np.ndarray:
     :param size: Order of Magic Square
     :return: Magic Square as numpy 2D array
     """
-    # Only magic squares of odd order
-    while size <= 2 or size % 2 == 0:
-        size += 1
+    # Only magic squares of odd order - create_square normalizes the size
+    assert size > 2 and size % 2 != 0
 
-    # Create empty square
-    square = np.zeros(shape=(size, size), dtype=int)
-
-    # Count - counts values put in Magic Square
-    # Row & col - cursor to array value
-    count, row, col = 1, 0, size // 2
-
-    # Cycle ends after every value is set
-    while count <= size ** 2:
-        if square[row, col] == 0:
-            # Set the 'count' value and increase count
-            square[row, col] = count
-            count += 1
-            # Move cursor to right and top
-            row = (row - 1) % size
-            col = (col + 1) % size
-        else:
-            # Return cursor at last position + move cursor down
-            row = (row + 2) % size
-            col = (col - 1) % size
+    # The cursor walk has a closed form: value k + 1 sits at
+    # row (2 * block - step) % size, col (size // 2 + step - block) % size,
+    # where block = k // size and step = k % size
+    values = np.arange(size ** 2)
+    blocks, steps = values // size, values % size
+    rows = (2 * blocks - steps) % size
+    cols = (size // 2 + steps - blocks) % size
+
+    # One fancy-index assignment instead of the cell-by-cell cursor loop
+    square = np.empty((size, size), _select_dtype(size))
+    square[rows, cols] = values + 1
 
     return square
 
@@ -69,9 +120,8 @@ def create_double_even_square(size: int) -> np.ndarray:
     :param size: Order of Magic Square
     :return: Magic Square as numpy 2D array
     """
-    # Only magic squares of double even order
-    while size % 4 != 0:
-        size += 1
+    # Only magic squares of double even order - create_square normalizes the size
+    assert size % 4 == 0
 
     # Starting value
     start = 1
@@ -79,36 +129,18 @@ def create_double_even_square(size: int) -> np.ndarray:
     stop = start + size ** 2
 
     # Create array with elements in a sequence
-    square = np.arange(start=start, stop=stop, dtype=int)
+    square = np.arange(start=start, stop=stop, dtype=_select_dtype(size))
     square = square.reshape((size, size))
 
-    # Create array with elements in a reverse sequence
-    reverse_square = np.arange(start=stop - 1, stop=start - 1, step=-1, dtype=int)
-    reverse_square = reverse_square.reshape((size, size))
-
     # Get amount of quarters (4x4) in one row
     quarters = size // 4
 
-    # Traverse through every quarter of square
-    for qrt_row in range(quarters):
-        for qrt_col in range(quarters):
-            # Get row and column indexes for this quarter
-            first_row, first_col = qrt_row * 4, qrt_col * 4
-            last_row, last_col = first_row + 3, first_col + 3
-            # Change x elements from square to x elements from reverse square
-            # [ ] [x] [x] [ ]
-            # [x] [ ] [ ] [x]
-            # [x] [ ] [ ] [x]
-            # [ ] [x] [x] [ ]
-            for i in (1, 2):
-                square[first_row, first_col + i] = \
-                    reverse_square[first_row, first_col + i]
-                square[last_row, first_col + i] = \
-                    reverse_square[last_row, first_col + i]
-                square[first_row + i, first_col] = \
-                    reverse_square[first_row + i, first_col]
-                square[first_row + i, last_col] = \
-                    reverse_square[first_row + i, last_col]
+    # Change x elements from square to x elements from reverse square
+    # in every quarter of the square, reusing the cached tiled mask
+    mask = _tile_pattern(quarters)
+    # The reverse sequence value is just the complement of the forward one,
+    # applied in place to the masked cells only
+    square[mask] = (start + stop - 1) - square[mask]
 
     return square
 
@@ -121,46 +153,57 @@ def create_even_square(size: int) -> np.ndarray:
     :return: Magic Square as numpy 2D array
     """
     # Only magic squares of even order
-    while size % 2 != 0:
-        size += 1
-    # Create empty squares, their alphabets and replacement dictionary
-    square_a = np.full(fill_value=-1, shape=(size, size), dtype=int)
-    square_b = np.zeros_like(square_a)
+    assert size % 2 == 0
+    # Create empty square and its alphabet
+    # The dtype must stay signed since -1 marks empty cells
+    dtype = np.int16 if size ** 2 < 2 ** 15 else np.int32
+    square_a = np.full(fill_value=-1, shape=(size, size), dtype=dtype)
     alphabet_a = range(0, size**2, size)
-    alphabet_b = range(1, size + 1)
-    replace = dict([(alphabet_a[i], alphabet_b[i]) for i in range(size)])
+
+    # Incremental occupancy tables make every candidacy check O(1):
+    # col_counts[col, i] - occurrences of alphabet_a[i] in column col
+    # row_has[row, i] - whether alphabet_a[i] is already in row
+    col_counts = np.zeros(shape=(size, size), dtype=np.int32)
+    row_has = np.zeros(shape=(size, size), dtype=bool)
 
     # Fill main and skew diagonals
     for i in range(size):
         square_a[i, i] = alphabet_a[i]
+        col_counts[i, i] += 1
+        row_has[i, i] = True
         square_a[size - i - 1, i] = alphabet_a[i]
+        col_counts[i, i] += 1
+        row_has[size - i - 1, i] = True
 
     # Fill empty places
     # The rule is that every alphabet symbol
     # can occur only in the column with the opposite symbol n // 2 times
     for i in range(size):
-        symbol, reverse_symbol = alphabet_a[i], alphabet_a[size - i - 1]
+        symbol = alphabet_a[i]
         for col in (i, size - i - 1):
             for row in range(size):
-                if np.count_nonzero(square_a[:, col] == symbol) != size // 2 and \
-                        symbol not in square_a[row, :] and \
+                if col_counts[col, i] != size // 2 and \
+                        not row_has[row, i] and \
                         square_a[row, col] == -1:
                     square_a[row, col] = symbol
-                    continue
+                    col_counts[col, i] += 1
+                    row_has[row, i] = True
 
     # Fill second square based on counterclockwise rotated first square
-    # square_a = np.rot90(square_a)
-    for symbol_a, symbol_b in replace.items():
-        square_b[square_a == symbol_a] = symbol_b
-    square_b = np.rot90(square_b)
+    # alphabet_a[i] = i * size maps to alphabet_b[i] = i + 1,
+    # so the replacement is plain integer division
+    # Resulting square is sum of both squares values,
+    # accumulated in place so no extra buffer is allocated
+    np.add(square_a, np.rot90(square_a // size), out=square_a)
+    square_a += 1
 
-    # Resulting square is sum of both squares values
-    return square_a + square_b
+    return square_a
 
 
 def transform_magic_square(
         square: np.ndarray,
-        amount: int = DEFAULT_OPS_AMOUNT
+        amount: int = DEFAULT_OPS_AMOUNT,
+        verify: bool = True
 ) -> np.ndarray:
     """
     Randomly transform Magic Square rows and columns
@@ -168,15 +211,20 @@ def transform_magic_square(
     If passed amount of transformations is < 0,
     then amount of operations is equal to order of the square
 
+    Every operation (rotation or symmetric row/column swap) preserves the
+    magic property, so callers passing freshly generated squares may skip
+    the upfront check with verify=False
+
     :param square: 2D NxN numpy array
     :param amount: Amount of transformation operations (default = 5)
+    :param verify: Check that the square is magic before transforming (default = True)
     :return: Transformed Magic Square
     """
     # Check if given array is magic square
-    if not check_square_magic(square):
+    if verify and not check_square_magic(square):
         return square
 
-    square = deepcopy(square)
+    square = square.copy()
     order = square.shape[0]
 
     if amount < 0:
@@ -185,53 +233,69 @@ def transform_magic_square(
     # Operations 3 and 4 cannot be performed for squares of even order or order 3!
     operations = 2 if order == 3 or (order % 4 != 0 and order % 2 == 0) else 4
 
-    for _ in range(amount):
-        # Randomly get operation number
-        operation = randint(0, operations)
+    # Pre-draw the unconstrained random decisions in one batch -
+    # NumPy's bit generator is much cheaper per draw than random.randint
+    rng = np.random.default_rng()
+    chosen_ops = rng.integers(0, operations + 1, size=amount)
+    first_idx = rng.integers(0, order, size=amount)
+
+    # Counterclockwise quarter turns accumulated modulo 4 and applied lazily,
+    # so runs of rotations collapse into a single np.rot90
+    pending_turns = 0
 
+    for count, operation in enumerate(chosen_ops):
         # Rotate square counterclockwise
         if operation == 0:
-            square = np.rot90(square, axes=(0, 1))
+            pending_turns = (pending_turns + 1) % 4
 
         # Rotate square clockwise
         elif operation == 1:
-            square = np.rot90(square, axes=(1, 0))
+            pending_turns = (pending_turns - 1) % 4
 
         # Swap row i and its opposite, column i and its opposite
         # For (0 <= i <= order - 1)
         elif operation == 2:
-            i = randint(0, order - 1)
+            # Materialize the pending rotation before indexed swaps
+            if pending_turns:
+                square = np.rot90(square, k=pending_turns)
+                pending_turns = 0
+            i = int(first_idx[count])
             i_op = order - i - 1
-            square[i, :], square[i_op, :] = square[i_op, :], square[i, :].copy()
-            square[:, i], square[:, i_op] = square[:, i_op], square[:, i].copy()
+            # Fancy-index assignment buffers the RHS itself, no .copy() needed
+            square[[i, i_op], :] = square[[i_op, i], :]
+            square[:, [i, i_op]] = square[:, [i_op, i]]
 
         # Operation 3 - swap rows i, j and their opposites
         # Operation 4 - swap columns i, j and their opposites
         # For i, j in (i < j < (order - 2) // 2)
         elif operation in (3, 4):
+            # Materialize the pending rotation before indexed swaps
+            if pending_turns:
+                square = np.rot90(square, k=pending_turns)
+                pending_turns = 0
             # For squares of order 4 and 5, i and j can take only one possible value
             if order in (4, 5):
                 i, j = 0, 1
             else:
-                i = randint(0, order // 4)
-                j = randint(i + 1, (order - 2) // 2)
+                # Drawn here with exact bounds since j depends on i -
+                # folding a wider draw in with % would bias the indexes
+                i = int(rng.integers(0, order // 4 + 1))
+                j = int(rng.integers(i + 1, (order - 2) // 2 + 1))
 
             # i, j opposite values
             i_op, j_op = order - i - 1, order - j - 1
 
             # Swap rows i, j and their opposites
             if operation == 3:
-                square[i, :], square[j, :] = \
-                    square[j, :], square[i, :].copy()
-                square[i_op, :], square[j_op, :] = \
-                    square[j_op, :], square[i_op, :].copy()
+                square[[i, j, i_op, j_op], :] = square[[j, i, j_op, i_op], :]
 
             # Swap columns i, j and their opposites
             elif operation == 4:
-                square[:, i], square[:, j] = \
-                    square[:, j], square[:, i].copy()
-                square[:, i_op], square[:, j_op] = \
-                    square[:, j_op],  square[:, i_op].copy()
+                square[:, [i, j, i_op, j_op]] = square[:, [j, i, j_op, i_op]]
+
+    # Apply whatever rotation is still pending in one go
+    if pending_turns:
+        square = np.rot90(square, k=pending_turns)
 
     return square
 
@@ -255,25 +319,18 @@ def check_square_magic(square: np.ndarray) -> bool:
     # Magic square's rows, cols and diagonals sums must be equal to magic constant
     magic_const = order * (order ** 2 + 1) // 2
 
-    # Main diagonals sum
-    lr_diagonal_sum = 0
-    rl_diagonal_sum = 0
-
-    for i in range(order):
-        # Check row sum
-        if sum(square[i, :]) != magic_const:
-            return False
-        # Check col sum
-        if sum(square[:, i]) != magic_const:
-            return False
-        # Sum diagonal values
-        lr_diagonal_sum += square[i, i]
-        rl_diagonal_sum += square[i, order - i - 1]
-
-    # Check diagonal sums
-    if sum(np.diag(square)) != magic_const:
+    # Check diagonal sums first - they touch 2N cells against N^2
+    # for the axis sums, so non-magic squares bail out cheaply
+    # Reductions accumulate in int64 so narrow square dtypes cannot overflow
+    if square.trace(dtype=np.int64) != magic_const:
         return False
-    if sum(np.diag(np.fliplr(square))) != magic_const:
+    if square[:, ::-1].trace(dtype=np.int64) != magic_const:
+        return False
+
+    # Check row and column sums with one vectorized reduction per axis
+    if not (square.sum(axis=1, dtype=np.int64) == magic_const).all():
+        return False
+    if not (square.sum(axis=0, dtype=np.int64) == magic_const).all():
         return False
 
     return True
@@ -296,11 +353,11 @@ def check_magic_square_symmetry(square: np.ndarray) -> bool:
     # Sum of two equidistant values must be equal to this value
     sum_const = order ** 2 + 1
 
-    # Cyclic traversal of first half of rows and columns
-    for row in range(order // 2):
-        for col in range(order // 2):
-            # Check sum of equidistant values
-            if square[row, col] + square[order - row - 1, order - col - 1] != sum_const:
-                return False
+    # Check sums of equidistant values over the first half of rows and columns
+    # with one broadcasted equality; the reversed view is a stride trick, not a copy
+    half = order // 2
+    opposite = square[::-1, ::-1]
+    # Pair sums are computed in int64 so narrow square dtypes cannot overflow
+    pair_sums = np.add(square[:half, :half], opposite[:half, :half], dtype=np.int64)
 
-    return True
+    return bool((pair_sums == sum_const).all())